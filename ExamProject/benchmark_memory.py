@@ -0,0 +1,97 @@
+# Memory benchmark of the load and plot paths on a large dataset.
+# Compares the old code with the current code and prints, for each interactive action,
+# the peak memory allocated while it runs and the memory and number of blocks it
+# allocated that are still held by its result (a snapshot diff).
+
+import os
+import tempfile
+import tracemalloc
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from main_household import load_measurements, aggregate_measurements, plot_statistics
+
+
+# Runs func and returns the peak memory in MB while it runs, and the memory in MB
+# and number of blocks allocated by it that its result still holds:
+def measure(func):
+    # The snapshots themselves are left out of the diff:
+    ignore_tracemalloc = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot().filter_traces(ignore_tracemalloc)
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot().filter_traces(ignore_tracemalloc)
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    del result
+    kept = sum(stat.size_diff for stat in stats)
+    blocks = sum(stat.count_diff for stat in stats)
+    return (peak - baseline) / 1e6, kept / 1e6, blocks
+
+
+# The old parsing in load_measurements(), via lists of strings:
+def old_load(path):
+    data = [row.split(",") for row in open(path, "r")]
+    data = np.array(data,dtype=float)
+    return data[:,:6], data[:,6:]
+
+
+# The old scaling in plot_statistics(), in place on the caller's (cached) array.
+# The drawing itself is unchanged, so it is done by the current plot_statistics():
+def old_plot(tvec_a, data_a, zone, time_unit):
+    data = data_a if zone == 0 else data_a[:, zone-1]
+    if np.max(data) > 50000:
+        data /= 1000
+    plot_statistics(tvec_a, data_a, zone, time_unit)
+
+
+def main(rows=200000):
+    rng = np.random.default_rng(0)
+    minutes = np.arange(rows)
+    tvec = np.column_stack([
+        np.full(rows, 2008), minutes // 43200 + 1, minutes // 1440 % 30 + 1,
+        minutes // 60 % 24, minutes % 60, np.zeros(rows)])
+    data = rng.gamma(2, 10, (rows, 4)).round(1)
+
+    # load_measurements() only reads files relative to its own folder:
+    folder = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", dir=folder, delete=False) as file:
+        np.savetxt(file, np.column_stack([tvec, data]), fmt="%g", delimiter=",")
+    filename = os.path.basename(file.name)
+
+    try:
+        tvec_l, data_l, _, _, _ = load_measurements(filename, "drop")
+        tvec_a, data_a = aggregate_measurements(tvec_l, data_l, "month")
+        # Each old plot gets its own copy, as it changes the data it is given:
+        old_all, old_zone = data_a.copy(), data_a.copy()
+        cached = data_a.copy()
+        # Warm-up, so the first measured plot doesn't pay for matplotlib's setup:
+        plot_statistics(tvec_a, cached, 0, "month")
+        plt.close("all")
+
+        actions = {
+            "Load (old)": lambda: old_load(file.name),
+            "Load (new)": lambda: load_measurements(filename, "drop"),
+            "Plot all zones (old)": lambda: old_plot(tvec_a, old_all, 0, "month"),
+            "Plot all zones (new)": lambda: plot_statistics(tvec_a, data_a, 0, "month"),
+            "Plot zone 1 (old)": lambda: old_plot(tvec_a, old_zone, 1, "month"),
+            "Plot zone 1 (new)": lambda: plot_statistics(tvec_a, data_a, 1, "month")}
+
+        print(f"{'Action':<24}{'Peak (MB)':<12}{'Kept (MB)':<12}{'Kept blocks':<12}")
+        for name, action in actions.items():
+            peak, kept, blocks = measure(action)
+            plt.close("all")
+            print(f"{name:<24}{peak:<12.2f}{kept:<12.2f}{blocks:<12}")
+        # The old plot path divided the cached aggregate by 1000 on every call:
+        print("Cached aggregate unchanged after plotting (old):", np.array_equal(cached, old_all))
+        print("Cached aggregate unchanged after plotting (new):", np.array_equal(cached, data_a))
+    finally:
+        os.remove(file.name)
+
+
+if __name__ == "__main__":
+    main()
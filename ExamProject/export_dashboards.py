@@ -0,0 +1,69 @@
+import argparse
+import os
+import time
+from multiprocessing import Pool
+from matplotlib.figure import Figure
+from main_household import load_measurements, aggregate_measurements, draw_statistics, aggregate_dir
+
+
+# Renders every zone of one aggregated household to image files:
+def render_zones(task):
+    # Author:   Lucas D. Vilsen, s224195
+    # Usage:    export_dashboards(), in a worker process
+    # Input:    tuple of tvec_a, data_a, period and a list of (zone, path).
+    # Returns:  number of written figures.
+
+    tvec_a, data_a, period, outputs = task
+    # A Figure without pyplot, so no global state is shared between the figures.
+    # The same Figure is cleared and reused for every zone:
+    fig = Figure()
+    for zone, path in outputs:
+        fig.clear()
+        draw_statistics(fig.add_subplot(), tvec_a, data_a, zone=zone, time_unit=period)
+        fig.savefig(path)
+    return len(outputs)
+
+
+# Saves the plot of every zone x period x household to a directory:
+def export_dashboards(filenames, out_dir, fmode="drop", periods=aggregate_dir,
+                      zones=range(5), processes=None, fmt="png"):
+    # Author:   Lucas D. Vilsen, s224195
+    # Usage:    nightly reports (see the command-line usage below)
+    # Input:    data filenames (as for load_measurements()), output directory,
+    #           fill mode, periods, zones, number of processes and image format.
+    # Returns:  number of written figures and figures per second.
+
+    start = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+
+    # Each household is loaded and aggregated once per period,
+    # and the rendering of its zones is sent to the pool as one task:
+    tasks = []
+    for filename in filenames:
+        household = os.path.splitext(os.path.basename(filename))[0]
+        tvec, data, _, _, _ = load_measurements(filename, fmode)
+        for period in periods:
+            tvec_a, data_a = aggregate_measurements(tvec, data, period)
+            outputs = [
+                (zone, os.path.join(out_dir, f"{household}_{period.replace(' ', '_')}_zone{zone}.{fmt}"))
+                for zone in zones]
+            tasks.append((tvec_a, data_a, period, outputs))
+
+    with Pool(processes) as pool:
+        n_figures = sum(pool.imap_unordered(render_zones, tasks))
+
+    elapsed = time.perf_counter() - start
+    rate = n_figures / elapsed if elapsed > 0 else 0.0
+    print(f"Exported {n_figures} figures to {out_dir} in {elapsed:.1f} s ({rate:.1f} figures/sec).")
+    return n_figures, rate
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export consumption plots for every zone, period and household.")
+    parser.add_argument("out_dir", help="directory the images are written to")
+    parser.add_argument("filenames", nargs="+", help="data files, relative to this folder")
+    parser.add_argument("--fmode", default="drop", choices=["forward fill", "backward fill", "drop"])
+    parser.add_argument("--processes", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--format", default="png", dest="fmt", help="image format, e.g. png or svg")
+    args = parser.parse_args()
+    export_dashboards(args.filenames, args.out_dir, args.fmode, processes=args.processes, fmt=args.fmt)
@@ -0,0 +1,156 @@
+import sqlite3
+import numpy as np
+# Imported as a module, since main_household also imports this file:
+import main_household
+
+
+# Time column used by aggregate_measurements() for each period:
+period_columns = {"hour": "hour", "day": "day", "month": "month", "hour of the day": "hour"}
+
+schema = """
+CREATE TABLE IF NOT EXISTS measurements (
+    household TEXT    NOT NULL,
+    timestamp TEXT    NOT NULL,
+    year      INTEGER NOT NULL,
+    month     INTEGER NOT NULL,
+    day       INTEGER NOT NULL,
+    hour      INTEGER NOT NULL,
+    minute    INTEGER NOT NULL,
+    second    INTEGER NOT NULL,
+    seq       INTEGER NOT NULL,
+    zone      INTEGER NOT NULL,
+    value     REAL    NOT NULL,
+    -- seq is the row number in the imported file, so a timestamp that repeats in a file
+    -- (e.g. when daylight saving time ends) is kept. The constraint is backed by an
+    -- index starting with (household, timestamp, zone), which the queries below use.
+    UNIQUE (household, timestamp, zone, seq)
+);
+"""
+
+
+# Opens (and creates if needed) a measurement store:
+def open_store(path=":memory:"):
+    # Author:   Alexander Wittrup, s224196
+    # Usage:    insert_measurements(), load_store(), aggregate_store()
+    # Input:    path to the sqlite file (in memory per default).
+    # Returns:  sqlite3 connection.
+
+    conn = sqlite3.connect(path)
+    conn.executescript(schema)
+    return conn
+
+
+# Helper that turns a tvec row into a sortable "YYYY-MM-DD HH:MM:SS" string:
+def to_timestamp(row):
+    return "{:04d}-{:02d}-{:02d} {:02d}:{:02d}:{:02d}".format(*(int(n) for n in row))
+
+
+# Inserts measurements loaded via load_measurements() into the store:
+def insert_measurements(conn, household: str, tvec: np.ndarray, data: np.ndarray):
+    # Author:   Alexander Wittrup, s224196
+    # Usage:    after load_measurements()
+    # Input:    connection, household name, tvec and data.
+    # Returns:  number of stored rows (one per measurement and zone).
+    #           The household's rows in the time span of tvec are replaced,
+    #           so a file can be imported again without duplicating it.
+
+    if len(tvec) == 0: return 0
+    timestamps = [to_timestamp(row) for row in tvec]
+    # One row per zone, so zones can be queried and indexed on their own.
+    # A generator, so the rows are never all in memory at once:
+    rows = (
+        (household, timestamps[i], *(int(n) for n in tvec[i]), i, zone+1, float(data[i, zone]))
+        for i in range(len(tvec)) for zone in range(data.shape[1]))
+    # The old rows are deleted and the new inserted in a single transaction:
+    with conn:
+        conn.execute(
+            "DELETE FROM measurements WHERE household = ? AND timestamp BETWEEN ? AND ?",
+            (household, min(timestamps), max(timestamps)))
+        changes = conn.total_changes
+        conn.executemany(
+            "INSERT INTO measurements VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    return conn.total_changes - changes
+
+
+# Builds the WHERE clause shared by the queries below:
+def where_clause(household, start=None, end=None):
+    # start and end are "YYYY-MM-DD HH:MM:SS" strings (or prefixes such as "2008-03"),
+    # start is inclusive and end is exclusive.
+    clause = "WHERE household = ?"
+    params = [household]
+    if start is not None:
+        clause += " AND timestamp >= ?"
+        params.append(start)
+    if end is not None:
+        clause += " AND timestamp < ?"
+        params.append(end)
+    return clause, params
+
+
+# Helper that pivots (*key, zone, value) rows, sorted by key, into a list of keys
+# and a (keys x zones) matrix:
+def pivot_zones(rows, n_zones=4):
+    key_idx = {}
+    for row in rows: key_idx.setdefault(row[:-2], len(key_idx))
+    data = np.zeros((len(key_idx), n_zones))
+    for row in rows:
+        data[key_idx[row[:-2]], row[-2]-1] = row[-1]
+    return list(key_idx), data
+
+
+# Loads measurements from the store in the same format as load_measurements():
+def load_store(conn, household: str, start=None, end=None):
+    # Author:   Alexander Wittrup, s224196
+    # Usage:    aggregate_measurements(), print_statistics()
+    # Input:    connection, household name and optional time interval.
+    # Returns:  tvec and data.
+
+    clause, params = where_clause(household, start, end)
+    rows = conn.execute(
+        f"SELECT timestamp, seq, zone, value FROM measurements {clause} ORDER BY timestamp, seq, zone",
+        params).fetchall()
+    keys, data = pivot_zones(rows)
+    tvec = np.array([
+        [int(t[0:4]), int(t[5:7]), int(t[8:10]), int(t[11:13]), int(t[14:16]), int(t[17:19])]
+        for t, _ in keys], dtype=float).reshape(-1, 6)
+    return tvec, data
+
+
+# Aggregates measurements inside the database, like aggregate_measurements():
+def aggregate_store(conn, household: str, period="minute", start=None, end=None):
+    # Author:   Alexander Wittrup, s224196
+    # Usage:    instead of load_store() + aggregate_measurements() on large stores
+    # Input:    connection, household name, period and optional time interval.
+    # Returns:  tvec_a and data_a.
+
+    if (period == "minute") or (period not in period_columns):
+        # No grouping needed, aggregate_measurements() converts to minutes:
+        tvec, data = load_store(conn, household, start, end)
+        if len(tvec) == 0: return np.zeros(0, dtype=int), data
+        return main_household.aggregate_measurements(tvec, data, "minute")
+
+    col = period_columns[period]
+    # Hour-of-day is an average, the other periods are sums:
+    func = "AVG" if period == "hour of the day" else "SUM"
+    clause, params = where_clause(household, start, end)
+    rows = conn.execute(
+        f"SELECT {col}, zone, {func}(value) FROM measurements {clause} "
+        f"GROUP BY {col}, zone ORDER BY {col}, zone", params).fetchall()
+    keys, data_a = pivot_zones(rows)
+    tvec_a = np.array([key[0] for key in keys], dtype=float)
+
+    if period == "hour of the day":
+        # Hours without data are zero like in aggregate_measurements():
+        hotd_data = np.zeros((24, 4))
+        hotd_data[tvec_a.astype(int)] = data_a
+        return np.arange(24), hotd_data
+    return tvec_a, data_a
+
+
+# Lists the households in the store:
+def list_households(conn):
+    # Author:   Alexander Wittrup, s224196
+    # Usage:    main()
+    # Returns:  sorted list of household names.
+
+    return [row[0] for row in conn.execute("SELECT DISTINCT household FROM measurements ORDER BY household")]
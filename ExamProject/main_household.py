@@ -1,11 +1,14 @@
 import matplotlib.pyplot as plt
 import numpy as np
 import platform
+import warnings
+import sys
 import os
+import household_store
 
 
 # String arrays for the set_display() function:
-main_options = ["Load Data", "Aggregate Data", "Display Statistics", "Visualize", "Quit"]
+main_options = ["Load Data", "Aggregate Data", "Display Statistics", "Visualize", "Database", "Quit"]
 aggregate_options = [
     "Consumption per minute (no aggregation)",
     "Consumption per hour",
@@ -15,26 +18,126 @@ aggregate_options = [
 ]
 aggregate_dir = ["minute", "hour", "day", "month", "hour of the day"]
 visualize_options = ["All zones", "Zone 1", "Zone 2", "Zone 3", "Zone 4"]
-dir_options = os.listdir(os.path.dirname(__file__))
+dir_options = [name for name in os.listdir(os.path.dirname(__file__)) if name.endswith((".csv", ".txt"))]
 fmode_options = [
     "Fill forward (replace corrupt measurement with latest valid measurement)",
     "Fill backward (replace corrupt measurement with next valid measurement)",
     "Delete corrupt measurements"]
 fmode_dir = ["forward fill", "backward fill", "drop"]
+detect_options = [
+    "Load without anomaly detection",
+    "Detect anomalies (flatlines and spikes are treated as corrupt, gaps are reported)"]
+detect_dir = [False, True]
+store_options = [
+    "Save the loaded data to the database",
+    "Load a household from the database"]
+# Default database, next to this file (another path can be given on the command line):
+default_store = os.path.join(os.path.dirname(os.path.abspath(__file__)), "household_store.db")
+
+
+# Helper that converts the columns of tvec to datetime64 minutes (vectorized):
+def to_minutes(tvec: np.ndarray):
+    tvec = tvec.astype(int)
+    months = ((tvec[:,0] - 1970) * 12 + tvec[:,1] - 1).astype("datetime64[M]")
+    days = months.astype("datetime64[D]") + (tvec[:,2] - 1)
+    return days.astype("datetime64[m]") + (tvec[:,3] * 60 + tvec[:,4])
+
+
+# Helper that turns a (rows x zones) boolean mask into (start, end, zone, type) events:
+def mask_to_events(times, mask, kind):
+    # Pads with False so every run has both a start and an end:
+    padded = np.zeros((mask.shape[0] + 2, mask.shape[1]), dtype=bool)
+    padded[1:-1] = mask
+    edges = np.diff(padded.astype(np.int8), axis=0)
+    starts = np.argwhere(edges == 1)
+    ends = np.argwhere(edges == -1)
+    # argwhere sorts by row, so the runs are matched per zone after sorting by zone:
+    starts = starts[np.lexsort((starts[:,0], starts[:,1]))]
+    ends = ends[np.lexsort((ends[:,0], ends[:,1]))]
+    return [(times[a], times[b-1], int(zone)+1, kind) for (a, zone), (b, _) in zip(starts, ends)]
+
+
+# Detects flatlines, spikes and missing minutes in measurements:
+def detect_anomalies(tvec: np.ndarray, data: np.ndarray, flat_len=60, spike_thresh=10.0):
+    # Author:   Alexander Wittrup, s224196
+    # Usage:    load_measurements()
+    # Input:    tvec and data (corrupt values as -1), the number of identical readings
+    #           that counts as a flatline and the MAD-score that counts as a spike.
+    # Returns:  mask of anomalous values (same shape as data) and a list of
+    #           (start, end, zone, type) events. Zone 0 means all zones.
+    #           Gaps are only reported: there are no rows for the missing minutes,
+    #           so they are not in the mask and are not filled.
+
+    times = to_minutes(tvec)
+    valid = data != -1
+
+    # Flatlines: runs of at least flat_len identical non-zero readings in a zone.
+    # Zero is excluded since zones can be legitimately unused for hours.
+    new_run = np.ones(data.shape, dtype=bool)
+    new_run[1:] = data[1:] != data[:-1]
+    flat = np.zeros(data.shape, dtype=bool)
+    for zone in range(data.shape[1]):
+        run_id = np.cumsum(new_run[:, zone]) - 1
+        run_len = np.bincount(run_id)[run_id]
+        flat[:, zone] = run_len >= flat_len
+    flat &= valid & (data != 0)
+
+    # Spikes: readings far from the zone median, measured in median absolute deviations (MAD).
+    # Mostly idle zones have a MAD of zero, so for them only the non-zero readings
+    # (the zone in use) are compared with each other. Zones that are still constant are skipped.
+    spike = np.zeros(data.shape, dtype=bool)
+    for zone in range(data.shape[1]):
+        candidates = valid[:, zone]
+        values = data[candidates, zone]
+        if values.size == 0: continue
+        median = np.median(values)
+        mad = np.median(np.abs(values - median))
+        if mad == 0:
+            candidates = candidates & (data[:, zone] != 0)
+            values = data[candidates, zone]
+            if values.size == 0: continue
+            median = np.median(values)
+            mad = np.median(np.abs(values - median))
+            if mad == 0: continue
+        score = 0.6745 * np.abs(data[:, zone] - median) / mad
+        spike[:, zone] = candidates & (score > spike_thresh)
+
+    events = mask_to_events(times, flat, "flatline") + mask_to_events(times, spike, "spike")
+
+    # Gaps: missing minutes between consecutive timestamps (all zones).
+    one_min = np.timedelta64(1, "m")
+    gap_idx = np.flatnonzero(np.diff(times) > one_min)
+    events += [(times[i] + one_min, times[i+1] - one_min, 0, "gap") for i in gap_idx]
+
+    events.sort(key=lambda event: (event[0], event[2]))
+    return flat | spike, events
 
 
 # Loads measurements from csv files:
-def load_measurements(filename: str, fmode="drop"):
+def load_measurements(filename: str, fmode="drop", detect=False):
     # Author:   Alexander Wittrup, s224196
     # Usage:    aggregate_measurements(), print_statistics()
-    # Input:    filename and fmode (fill mode) strings.
-    # Returns:  tvec, data, and error message if there is any (suffix).
+    # Input:    filename and fmode (fill mode) strings, and whether to detect anomalies.
+    #           Detected flatlines and spikes are treated like corrupt measurements,
+    #           gaps are only reported (see detect_anomalies()).
+    # Returns:  tvec, data, message (prefix), error message if there is any (suffix),
+    #           and the list of detected events (empty if detect is False).
 
     # Ensuring a correct path and converting the csv to a numpy array:
     abspath = os.path.dirname(os.path.abspath(__file__))
     path = abspath + "/" + filename
-    data = [row.split(",") for row in open(path, "r")]
-    data = np.array(data,dtype=float)
+    # Parsed straight into one float matrix, tvec and data are returned as views of it.
+    # An empty file raises like before, without the "no data" warning from numpy:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        data = np.loadtxt(path, delimiter=",", ndmin=2)
+    if data.shape[1] != 10: raise ValueError(f"{filename} is not a valid data file")
+
+    # Anomalous measurements are marked as corrupt so the fill modes handle them:
+    events = []
+    if detect and data.size > 0:
+        anomalies, events = detect_anomalies(data[:,:6], data[:,6:])
+        data[:,6:][anomalies] = -1
 
     # Mask that excludes all rows with corrupt measurements:
     mask_valid_rows = np.all(data != -1, axis=1)
@@ -48,14 +151,13 @@ def load_measurements(filename: str, fmode="drop"):
         f"{pct:.1%} of the data was corrupted and has been removed instead.")
     success = f"Data successfully loaded."
     success_corrupt = f"\n{pct:.1%} of data was corrupted and has been filled or excluded."
+    detected = f"\n{len(events)} anomalies (flatlines, spikes or gaps) were detected."
     prefix = ""
     suffix = ""
 
     if fmode == "drop":
         data = data[mask_valid_rows]
-        if data.size <= 0 : data = np.zeros(10)[None, :]
-        return data[:,:6], data[:,6:], prefix, suffix
-    
+
     elif fmode == "forward fill":
         # Drops corrupt data if the first row is corrupt:
         if np.any(data[0] == -1):
@@ -86,7 +188,10 @@ def load_measurements(filename: str, fmode="drop"):
     # If there is no data 
     if data.size <= 0 : data = np.zeros(10)[None, :]
 
-    return data[:,:6], data[:,6:], prefix, suffix
+    # The number of events is added to the message whatever the fill mode:
+    if detect: prefix = prefix + detected if prefix else detected.lstrip("\n")
+
+    return data[:,:6], data[:,6:], prefix, suffix, events
 
 
 # Aggregates measurements loaded via load_measurements():
@@ -177,14 +282,13 @@ def print_statistics(_, data: np.ndarray) -> None:
     print(splitline)
 
 
-# Plots statistics from the loaded data
-def plot_statistics(tvec: np.ndarray, data: np.ndarray, zone=0, time_unit="minute"):
+# Draws statistics from the loaded data on a matplotlib Axes
+def draw_statistics(ax, tvec: np.ndarray, data: np.ndarray, zone=0, time_unit="minute"):
     # Author:         Lucas D. Vilsen, s224195
-    # Usage:          main function
-    # Input:          tvec and data (via. load_measurements()),
+    # Usage:          plot_statistics(), export_dashboards()
+    # Input:          Axes to draw on, tvec and data (via. load_measurements()),
     #                 desired zone (string or integer), and the time unit as a string
     # Return:         None
-    # Screen output:  Matplotlib plot
 
     # We choose the zone appropriate data
     if zone == 0:
@@ -207,8 +311,10 @@ def plot_statistics(tvec: np.ndarray, data: np.ndarray, zone=0, time_unit="minut
     width = 0.15
 
     # If the values get too high, change unit:
+    # data can be a view of the caller's (cached) data, so it is scaled into a new array
+    # instead of in place:
     if np.max(data) > 50000:
-        data /= 1000
+        data = data / 1000
         unit = "k"
     else:
         unit = ""
@@ -218,43 +324,78 @@ def plot_statistics(tvec: np.ndarray, data: np.ndarray, zone=0, time_unit="minut
         for i in range(4):
             if cond_bar_plot:
                 new_tvec = np.arange(len(tvec))
-                plt.bar(new_tvec + width*(i-1.5), data[:,i], width=width)
+                ax.bar(new_tvec + width*(i-1.5), data[:,i], width=width)
             else:
-                plt.plot(tvec, data[:,i], label=labels[i], color=colors[i], alpha=alpha)
+                ax.plot(tvec, data[:,i], label=labels[i], color=colors[i], alpha=alpha)
     # or just plot the zone we want to look at
     else: 
         if cond_bar_plot:
             new_tvec = np.arange(len(tvec))
-            plt.bar(new_tvec, data)
+            ax.bar(new_tvec, data)
         else:
-            plt.plot(tvec, data, label=f"Zone {zone}", color="r",alpha=alpha)
+            ax.plot(tvec, data, label=f"Zone {zone}", color="r",alpha=alpha)
 
     # we make the layout
-    plt.title(f"Consumption for {title} per {time_unit}")
-    plt.xlabel(f"Time ({time_unit}s)")
-    plt.ylabel(f"Energy ({unit}Wh)")
-    plt.tight_layout()
+    ax.set_title(f"Consumption for {title} per {time_unit}")
+    ax.set_xlabel(f"Time ({time_unit}s)")
+    ax.set_ylabel(f"Energy ({unit}Wh)")
 
     if time_unit == "hour of the day": # Unique case:
-        plt.title(f"Average consumption for {title} per hour")
-        plt.xlabel(f"Time (hours)")
-        plt.ylabel(f"Energy (Wh)")
+        ax.set_title(f"Average consumption for {title} per hour")
+        ax.set_xlabel(f"Time (hours)")
+        ax.set_ylabel(f"Energy (Wh)")
     
     # Makes x-axis more readable:
     if (time_unit in ["hour", "day", "hour of the day"]) and (not cond_bar_plot):
-        plt.xticks(rotation = 45)
+        ax.tick_params(axis="x", labelrotation=45)
     
     if cond_bar_plot:
-        plt.xticks(range(len(tvec)), [str(int(n)) for n in tvec])
+        ax.set_xticks(range(len(tvec)), [str(int(n)) for n in tvec])
     elif time_unit != "minute":
-        plt.xticks(tvec)
+        ax.set_xticks(tvec)
 
     if not cond_bar_plot:
-        plt.grid()
-        plt.legend(labels)
+        ax.grid()
+        ax.legend(labels)
+    ax.figure.tight_layout()
+
+
+# Plots statistics from the loaded data
+def plot_statistics(tvec: np.ndarray, data: np.ndarray, zone=0, time_unit="minute"):
+    # Author:         Lucas D. Vilsen, s224195
+    # Usage:          main function
+    # Input:          tvec and data (via. load_measurements()),
+    #                 desired zone (string or integer), and the time unit as a string
+    # Return:         None
+    # Screen output:  Matplotlib plot
+
+    _, ax = plt.subplots()
+    draw_statistics(ax, tvec, data, zone, time_unit)
     plt.show()
 
 
+# Prints the anomalies detected by load_measurements()
+def print_events(events, max_rows=20):
+    # Author: Lucas D. Vilsen, s224195
+    # Usage:  main function
+    # Input:  list of (start, end, zone, type) events and the max number of rows to print
+    # Return: None
+    # Screen  output: Event table
+
+    splitline = "-"*60
+    print(f"Detected anomalies ({len(events)}):")
+    print(splitline)
+    print(f"{'Start':<20}{'End':<20}{'Zone':<8}{'Type':<10}")
+    print(splitline)
+    for start, end, zone, kind in events[:max_rows]:
+        # Zone 0 means all zones (gaps):
+        zone = "All" if zone == 0 else zone
+        print(f"{str(start):<20}{str(end):<20}{zone:<8}{kind:<10}")
+    if len(events) > max_rows:
+        print(f"... and {len(events) - max_rows} more")
+    print(splitline)
+
+
 # Mini function to numerate and join a list of strings:
 numerated_str = lambda list: "".join(f"{idx}. {item}\n" for idx, item in enumerate(list))
 # Mini function to clear the terminal depending on the os:
@@ -283,6 +424,7 @@ err_notint = "Error: Invalid input, try with an integer."
 err_badrange = "Error: Number is not among the options, try another number"
 err_badfile = "Error: Invalid file, try another file"
 err_nodata = "Error: No data to perform action on"
+err_emptystore = "Error: The database is empty, save some data first"
 back_val = 99
 
 # Helper function, Check if input string is in range
@@ -303,9 +445,10 @@ def is_valid_num(num:str, num_range:list):
 
 
 # The command-line UI
-def main():
+def main(store_path=default_store):
     # Authors:  Alexander Wittrup, s224196
     #           Lucas D. Vilsen, s224195
+    # Input:    path to the sqlite database used by the "Database" action.
 
     # Variable initial values:
     tvec = None
@@ -316,6 +459,11 @@ def main():
     prefix = ""
     suffix = ""
     period = "minute"
+    events = []
+    # Name of the loaded household, and whether it was loaded from the database:
+    household = None
+    from_store = False
+    store_conn = None
     display_intro = True
 
     while True:
@@ -373,13 +521,28 @@ def main():
                         break
                     elif fmode_inp is None:
                         continue
-                    else:
-                        clear_terminal()
-                        print("Loading ...")
-                        tvec, data, prefix, suffix = load_measurements(dir_options[inp], fmode_dir[fmode_inp])
-                        # If new data is loaded, reset aggregated data:
-                        tvec_a, data_a = None, None
-                        break
+
+                    while True: # detect loop
+                        # Display the anomaly detection options and ask for input:
+                        prefix = "Choose whether to detect anomalies:"
+                        set_display(detect_options, prefix, suffix)
+                        prefix = ""
+
+                        detect_inp, suffix = is_valid_num(input(), range(len(detect_options)))
+                        if detect_inp is not None:
+                            break
+                    if detect_inp == back_val:  # back to the fill modes
+                        continue
+
+                    clear_terminal()
+                    print("Loading ...")
+                    tvec, data, prefix, suffix, events = load_measurements(
+                        dir_options[inp], fmode_dir[fmode_inp], detect_dir[detect_inp])
+                    household = os.path.splitext(dir_options[inp])[0]
+                    from_store = False
+                    # If new data is loaded, reset aggregated data:
+                    tvec_a, data_a = None, None
+                    break
                 if back:  # to differentiate "back" being pressed and the loop finishing
                     continue
                 break
@@ -399,7 +562,9 @@ def main():
                 else:
                     # Return aggregated data:
                     period = aggregate_dir[inp]
-                    tvec_a, data_a = aggregate_measurements(tvec, data, period)
+                    # Data from the database is aggregated by the database:
+                    if from_store: tvec_a, data_a = household_store.aggregate_store(store_conn, household, period)
+                    else: tvec_a, data_a = aggregate_measurements(tvec, data, period)
                     # Don't give any message when not aggregating:
                     if period != "minute": prefix = f"Data successfully aggregated by {period}."
                     break
@@ -416,6 +581,8 @@ def main():
                     print(f"Electricity consumption per {period}:")
                 # Print aggregated data if any:
                 print_statistics(None, data) if tvec_a is None else print_statistics(None, data_a)
+                # Print the detected anomalies if any:
+                if events: print_events(events)
 
                 print("99. Back")
                 print(suffix)
@@ -449,7 +616,52 @@ def main():
                     continue
                 plot_statistics(tvec_a, data_a, zone=visualize_input, time_unit=period)
         
+        elif inp == "Database":
+            if store_conn is None: store_conn = household_store.open_store(store_path)
+            while True:
+                # Display the database actions and ask for input:
+                prefix = f"Database: {store_path}"
+                set_display(store_options, prefix, suffix)
+                prefix = ""
+
+                store_inp, suffix = is_valid_num(input(), range(len(store_options)))
+                if store_inp == back_val:
+                    break
+                elif store_inp is None:
+                    continue
+                elif store_options[store_inp] == "Save the loaded data to the database":
+                    if tvec is None:
+                        suffix = err_nodata
+                        continue
+                    n_rows = household_store.insert_measurements(store_conn, household, tvec, data)
+                    prefix = f"{n_rows // data.shape[1]} measurements of {household} saved to the database."
+                    break
+
+                households = household_store.list_households(store_conn)
+                if not households:
+                    suffix = err_emptystore
+                    continue
+                while True: # household loop
+                    # Display the stored households and ask for input:
+                    set_display(households, "Choose a household:", suffix)
+                    house_inp, suffix = is_valid_num(input(), range(len(households)))
+                    if house_inp is not None: break
+                if house_inp == back_val:  # back to the database actions
+                    continue
+
+                clear_terminal()
+                print("Loading ...")
+                household = households[house_inp]
+                tvec, data = household_store.load_store(store_conn, household)
+                from_store = True
+                events = []
+                # If new data is loaded, reset aggregated data:
+                tvec_a, data_a = None, None
+                prefix = f"{household} loaded from the database."
+                break
+
         elif inp == "Quit":
+            if store_conn is not None: store_conn.close()
             return
 
 
@@ -459,8 +671,9 @@ if __name__ == "__main__":
     # period = "hour of the day"
 
     # clear_terminal()
-    # tvec, data, _, _ = load_measurements("testdata1.csv", fmode)
+    # tvec, data, _, _, _ = load_measurements("testdata1.csv", fmode)
     # tvec_a, data_a = aggregate_measurements(tvec, data, period)
 
     # plot_statistics(tvec_a, data_a, zone=zone, time_unit=period)
-    main()
\ No newline at end of file
+    # An optional path to the database can be given: python main_household.py [database]
+    main(sys.argv[1]) if len(sys.argv) > 1 else main()
\ No newline at end of file
@@ -0,0 +1,65 @@
+# Regression checks for the anomaly detection in load_measurements(), run with pytest.
+
+import os
+import tempfile
+import numpy as np
+from main_household import detect_anomalies, load_measurements
+
+
+# Helper that builds n consecutive minutes with zone 3 idle 95% of the time
+# and an appliance using about 1000 Wh when it runs:
+def idle_zone_data(n=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    minutes = np.arange(n)
+    tvec = np.column_stack([
+        np.full(n, 2008), minutes // 40320 + 1, minutes // 1440 % 28 + 1,
+        minutes // 60 % 24, minutes % 60, np.zeros(n)])
+    # The other zones are steady, so only zone 3 can be flagged:
+    data = rng.normal(20, 2, (n, 4)).round(1)
+    data[:, 2] = np.where(rng.random(n) < 0.05, rng.normal(1000, 50, n).round(1), 0)
+    return tvec, data
+
+
+# Helper that writes the data next to main_household.py (where load_measurements() reads)
+# and returns the filename:
+def write_csv(tvec, data):
+    folder = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", dir=folder, delete=False) as file:
+        np.savetxt(file, np.column_stack([tvec, data]), fmt="%g", delimiter=",")
+    return os.path.basename(file.name)
+
+
+def test_idle_zone_usage_is_not_a_spike():
+    tvec, data = idle_zone_data()
+    mask, events = detect_anomalies(tvec, data)
+    assert not mask[:, 2].any()
+    assert not [event for event in events if event[2] == 3]
+
+
+def test_spike_in_idle_zone_is_found():
+    tvec, data = idle_zone_data()
+    on = np.flatnonzero(data[:, 2])
+    data[on[10], 2] = 99999
+    mask, _ = detect_anomalies(tvec, data)
+    assert np.flatnonzero(mask[:, 2]).tolist() == [on[10]]
+
+
+def test_detection_keeps_idle_zone_usage():
+    tvec, data = idle_zone_data()
+    filename = write_csv(tvec, data)
+    try:
+        for fmode in ["forward fill", "backward fill", "drop"]:
+            _, loaded, _, _, _ = load_measurements(filename, fmode, detect=True)
+            assert np.allclose(loaded[:, 2], data[:, 2])
+    finally:
+        os.remove(os.path.join(os.path.dirname(os.path.abspath(__file__)), filename))
+
+
+def test_messages_and_events():
+    # The first row of testdata1.csv is corrupt, so forward fill fails:
+    _, _, prefix, suffix, events = load_measurements("testdata1.csv", "forward fill", detect=True)
+    assert "successfully" not in prefix
+    assert suffix.startswith("Error")
+    assert prefix.startswith(f"{len(events)} anomalies")
+    # Without detection the events are always an empty list:
+    assert load_measurements("testdata3.csv", "drop")[4] == []
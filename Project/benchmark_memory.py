@@ -0,0 +1,83 @@
+# This function only runs in Python 3
+# Memory benchmark of the filter and plot paths on a large dataset.
+# It compares the old list based code with the current numpy code and prints, for each
+# interactive action, the peak memory allocated while it runs and the memory and number
+# of blocks it allocated that are still held by its result (a snapshot diff).
+
+import builtins
+import tracemalloc
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from main import dataFilter, growthByTemperature
+
+# This function runs func and returns the peak memory in MB while it runs,
+# and the memory in MB and number of blocks allocated by it that its result still holds.
+def measure(func):
+    # The snapshots themselves are left out of the diff.
+    ignoreTracemalloc = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot().filter_traces(ignoreTracemalloc)
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot().filter_traces(ignoreTracemalloc)
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    del result
+    kept = sum(stat.size_diff for stat in stats)
+    blocks = sum(stat.count_diff for stat in stats)
+    return (peak - baseline) / 1e6, kept / 1e6, blocks
+
+
+# This function calls dataFilter with the answers given to input() in order.
+def filterWithInput(data, answers):
+    answers = iter(answers)
+    originalInput = builtins.input
+    builtins.input = lambda _="": next(answers)
+    try: return dataFilter(data, data)
+    finally: builtins.input = originalInput
+
+
+# The old way of preparing the growth rate plot: the whole array is sorted
+# and the values of every bacteria are collected in Python lists.
+def oldPlotValues(data):
+    data = data[data[:,0].argsort()]
+    values = []
+    for Bacteria in range(1,5):
+        values.append([data[i,0] for i in range(len(data)) if data[i,2] == Bacteria])
+        values.append([data[i,1] for i in range(len(data)) if data[i,2] == Bacteria])
+    return values
+
+
+# The current way, with the same helper as dataPlot.
+def newPlotValues(data):
+    return [growthByTemperature(data, Bacteria) for Bacteria in range(1,5)]
+
+
+def main(rows=200000):
+    rng = np.random.default_rng(0)
+    data = np.column_stack([
+        rng.integers(10, 61, rows),
+        rng.random(rows),
+        rng.integers(1, 5, rows)]).astype(float)
+
+    actions = {
+        "Filter by bacteria (old)": lambda: np.array([data[i,:] for i in range(len(data)) if data[i,2] == 2]),
+        "Filter by bacteria (new)": lambda: filterWithInput(data, ["1", "2"]),
+        "Filter by interval (old)": lambda: np.array([data[i,:] for i in range(len(data)) if data[i,1] > 0.2 and data[i,1] < 0.4]),
+        "Filter by interval (new)": lambda: filterWithInput(data, ["2", "0.2", "0.4"]),
+        "Plot values (old)": lambda: oldPlotValues(data),
+        "Plot values (new)": lambda: newPlotValues(data)}
+
+    print(f"{'Action':<28}{'Peak (MB)':<12}{'Kept (MB)':<12}{'Kept blocks':<12}")
+    for name, action in actions.items():
+        peak, kept, blocks = measure(action)
+        print(f"{name:<28}{peak:<12.2f}{kept:<12.2f}{blocks:<12}")
+    plt.close("all")
+
+
+if __name__ == "__main__":
+    main()
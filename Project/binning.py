@@ -0,0 +1,185 @@
+# This function only runs in Python 3
+
+import numpy as np
+from multiprocessing import Pool
+
+# The temperature range enforced by dataLoad in main.py.
+temperatureMin = 10
+temperatureMax = 60
+# The number of bacteria types in the bacteria lookup in main.py.
+numberOfBacteria = 4
+
+# This function creates empty accumulators for the binned statistics.
+# It takes the bin width as input and returns a dictionary with the bin edges
+# and a count, mean and M2 (sum of squared deviations) array for each bacteria and bin.
+def emptyBinStatistics(binWidth : float = 10) -> dict:
+    if not np.isfinite(binWidth) or binWidth <= 0:
+        raise ValueError("The bin width has to be a positive number")
+    # The edges stay within 10 to 60. The last bin is closed, so it also holds 60,
+    # and it is narrower than binWidth if the width doesn't divide the range.
+    edges = np.arange(temperatureMin, temperatureMax, binWidth, dtype=float)
+    edges = np.append(edges[edges < temperatureMax], temperatureMax)
+    shape = (numberOfBacteria, len(edges) - 1)
+    return {
+        "edges": edges,
+        "count": np.zeros(shape, dtype=np.int64),
+        "mean": np.zeros(shape),
+        "M2": np.zeros(shape)}
+
+
+# This function merges two sets of accumulators into a new one.
+# It uses Chan et al.'s parallel version of Welford's algorithm,
+# so the result is the same as if all rows had been seen by one accumulator.
+def mergeBinStatistics(first : dict, second : dict) -> dict:
+    if not np.array_equal(first["edges"], second["edges"]):
+        raise ValueError("Only statistics with the same bins can be merged")
+    count = first["count"] + second["count"]
+    # We avoid dividing by zero in the bins that are still empty.
+    safeCount = np.where(count > 0, count, 1)
+    delta = second["mean"] - first["mean"]
+    mean = first["mean"] + delta * second["count"] / safeCount
+    M2 = first["M2"] + second["M2"] + delta**2 * first["count"] * second["count"] / safeCount
+    return {"edges": first["edges"], "count": count, "mean": mean, "M2": M2}
+
+
+# This function adds a chunk of data to the accumulators.
+# It takes the accumulators and a numpy array with the same columns as dataLoad returns
+# (temperature, growth rate, bacteria) and returns the updated accumulators.
+# Rows with a temperature outside the bins or an unknown bacteria are left out.
+def updateBinStatistics(statistics : dict, data : np.ndarray) -> dict:
+    edges = statistics["edges"]
+    shape = statistics["count"].shape
+    binIndex = np.digitize(data[:,0], edges) - 1
+    # A temperature equal to the last edge belongs to the last (closed) bin.
+    binIndex[data[:,0] == edges[-1]] = shape[1] - 1
+    bacteria = data[:,2].astype(int)
+    valid = (binIndex >= 0) & (binIndex < shape[1]) & (bacteria >= 1) & (bacteria <= shape[0])
+    data = data[valid]
+    if len(data) == 0:
+        return statistics
+    # Every row is given a single flat index from its bacteria and temperature bin,
+    # so the whole chunk can be summarised with bincount instead of a Python loop.
+    flatIndex = (bacteria[valid] - 1) * shape[1] + binIndex[valid]
+    size = shape[0] * shape[1]
+    count = np.bincount(flatIndex, minlength=size)
+    growthSum = np.bincount(flatIndex, weights=data[:,1], minlength=size)
+    safeCount = np.where(count > 0, count, 1)
+    mean = growthSum / safeCount
+    deviation = data[:,1] - mean[flatIndex]
+    M2 = np.bincount(flatIndex, weights=deviation**2, minlength=size)
+    chunk = {
+        "edges": edges,
+        "count": count.reshape(shape),
+        "mean": mean.reshape(shape),
+        "M2": M2.reshape(shape)}
+    return mergeBinStatistics(statistics, chunk)
+
+
+# This function parses a list of rows the same way dataLoad does,
+# but silently skips the invalid rows, as printing for every bad row
+# in a large archive would flood the terminal.
+# It returns a numpy array and the number of skipped rows.
+def parseRows(rows : list) -> tuple:
+    data = []
+    skipped = 0
+    for row in rows:
+        try:
+            temperature, growthRate, bacteria = row.split()
+            temperature = int(temperature)
+            growthRate = float(growthRate)
+            bacteria = int(bacteria)
+        except ValueError:
+            skipped += 1
+            continue
+        if temperature < temperatureMin or temperature > temperatureMax \
+                or growthRate < 0 or not 1 <= bacteria <= numberOfBacteria:
+            skipped += 1
+            continue
+        data.append([temperature, growthRate, bacteria])
+    return np.array(data, dtype=float).reshape(-1, 3), skipped
+
+
+# This function computes the binned statistics of a file without loading it all into memory.
+# It reads chunkSize rows at a time, so the memory used does not depend on the size of the file.
+# It returns the accumulators and the number of skipped rows.
+def streamBinStatistics(filename : str, binWidth : float = 10, chunkSize : int = 100000) -> tuple:
+    statistics = emptyBinStatistics(binWidth)
+    skipped = 0
+    with open(filename, "r") as file:
+        rows = []
+        for row in file:
+            rows.append(row)
+            if len(rows) == chunkSize:
+                chunk, chunkSkipped = parseRows(rows)
+                statistics = updateBinStatistics(statistics, chunk)
+                skipped += chunkSkipped
+                rows = []
+        chunk, chunkSkipped = parseRows(rows)
+        statistics = updateBinStatistics(statistics, chunk)
+        skipped += chunkSkipped
+    return statistics, skipped
+
+
+# This function computes the binned statistics of several files in parallel.
+# Every file is handled by its own worker and the results are merged afterwards.
+# It returns the merged accumulators and the total number of skipped rows.
+def parallelBinStatistics(filenames : list, binWidth : float = 10, chunkSize : int = 100000, processes : int = None) -> tuple:
+    with Pool(processes) as pool:
+        results = pool.starmap(streamBinStatistics, [(filename, binWidth, chunkSize) for filename in filenames])
+    statistics = emptyBinStatistics(binWidth)
+    skipped = 0
+    for result, resultSkipped in results:
+        statistics = mergeBinStatistics(statistics, result)
+        skipped += resultSkipped
+    return statistics, skipped
+
+
+# This function returns the standard deviation in every bin from the accumulators.
+# Like np.std it is the population standard deviation, and empty bins get nan.
+def binStd(statistics : dict) -> np.ndarray:
+    count = statistics["count"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(count > 0, np.sqrt(statistics["M2"] / count), np.nan)
+
+
+# This function prints a table with the count, mean and std of the growth rate
+# for every bacteria and temperature bin that contains data.
+def printBinStatistics(statistics : dict, bacteriaNames : dict) -> None:
+    edges = statistics["edges"]
+    std = binStd(statistics)
+    splitline = "-"*70
+    print(splitline)
+    print(f"{'Bacteria':<28}{'Temperature':<14}{'Count':<10}{'Mean':<10}{'Std':<10}")
+    print(splitline)
+    for bacteria in range(numberOfBacteria):
+        for i in range(len(edges) - 1):
+            count = statistics["count"][bacteria, i]
+            if count == 0:
+                continue
+            # The last bin is closed, see emptyBinStatistics.
+            closing = "]" if i == len(edges) - 2 else ")"
+            interval = f"[{edges[i]:g}, {edges[i+1]:g}{closing}"
+            print(f"{bacteriaNames[bacteria+1]:<28}{interval:<14}{count:<10}"
+                  f"{statistics['mean'][bacteria, i]:<10.4f}{std[bacteria, i]:<10.4f}")
+    print(splitline)
+
+
+# The binned statistics of files too large for dataLoad can be computed from the command line:
+#   python binning.py WIDTH FILE [FILE ...]
+# A single file is streamed in chunks, several files are handled in parallel and merged.
+if __name__ == "__main__":
+    import sys
+    from main import bacteria_lookup
+    if len(sys.argv) < 3:
+        print("Usage: python binning.py WIDTH FILE [FILE ...]"); sys.exit(1)
+    try: binWidth = float(sys.argv[1])
+    except ValueError: print("The bin width has to be a number"); sys.exit(1)
+    if not np.isfinite(binWidth) or binWidth <= 0:
+        print("The bin width has to be a positive number"); sys.exit(1)
+    filenames = sys.argv[2:]
+    if len(filenames) == 1:
+        statistics, skipped = streamBinStatistics(filenames[0], binWidth)
+    else:
+        statistics, skipped = parallelBinStatistics(filenames, binWidth)
+    printBinStatistics(statistics, bacteria_lookup)
+    print(f"{skipped} invalid rows were skipped.")
@@ -1,7 +1,10 @@
 # This function only runs in Python 3
 
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
+from binning import emptyBinStatistics, updateBinStatistics, printBinStatistics
+from store import openStore, storeData, loadStore
 
 # Bacteria lookup matching the corresponding number to the bacteria name.
 bacteria_lookup = {
@@ -19,7 +22,8 @@ statisticLookup = {
     5: "Rows",
     6: "Mean Cold Growth rate",
     7: "Mean Hot Growth rate",
-    8: "Go back to the main menu"}
+    8: "Growth rate by temperature bin",
+    9: "Go back to the main menu"}
 
 # This function loads the data.
 # It takes a filename string as input and returns a numpy array.
@@ -85,9 +89,10 @@ def dataStatistics(data : np.ndarray):
                       "5. Rows\n"
                       "6. Mean Cold Growth rate\n"
                       "7. Mean Hot Growth rate\n"
-                      "8. Go back to the main menu\n")
-    # We then check that this value is corresponds to one of the choices from 1 to 8.
-    statistic = checkIfValidNumber(statisticInput, 1, 8)
+                      "8. Growth rate by temperature bin\n"
+                      "9. Go back to the main menu\n")
+    # We then check that this value is corresponds to one of the choices from 1 to 9.
+    statistic = checkIfValidNumber(statisticInput, 1, 9)
     # Based on the input we compute the desired statistic
     # and assign it to the statisticValue variable.
     if statistic == 1:
@@ -106,14 +111,33 @@ def dataStatistics(data : np.ndarray):
     elif statistic == 7:
         coldGrowthRate = [data[i, 1] for i in range(len(data)) if data[i, 0] < 20]
         statisticValue = np.mean(coldGrowthRate)
+    elif statistic == 8:
+        # The user chooses the width of the temperature bins,
+        # and the count, mean and std of the growth rate is printed for every bacteria and bin.
+        binWidth = input("Please input the width of the temperature bins:\n")
+        try: binWidth = float(binWidth)
+        except: print("You need to type a number"); return None
+        if not np.isfinite(binWidth) or binWidth <= 0:
+            print("The bin width has to be a positive number"); return None
+        statistics = updateBinStatistics(emptyBinStatistics(binWidth), data)
+        printBinStatistics(statistics, bacteria_lookup)
+        return None
     # If the user wishes to go back to the main menu
     # None is returned and therefore nothing is computed or displayed.
-    elif statistic == 8:
+    elif statistic == 9:
         return None
     # We then print the statistic together with information on which statistic this is.
     print(f"The {statisticLookup[statistic]} of your current data is: {statisticValue}")
 
 
+# This function returns the temperatures and growth rates of one type of bacteria, sorted by temperature.
+# Only the rows of this bacteria are sorted, so the data itself is never copied or reordered.
+def growthByTemperature(data : np.ndarray, bacteria : int) -> tuple:
+    mask = data[:,2] == bacteria
+    order = data[mask,0].argsort()
+    return data[mask,0][order], data[mask,1][order]
+
+
 # This function will plot 2 plots based on the data.
 # It takes the data as an array as an input and returns nothing.
 # It opens a new window and displays 2 plots in it.
@@ -138,10 +162,8 @@ def dataPlot(data : np.ndarray) -> None:
     # Plotting Growth rate by temperature
     plt.subplot(2, 1, 2)
     # We then loop through every kind of bacteria and plot their data.
-    data = data[data[:,0].argsort()]
     for Bacteria in range(1,5):
-        xValuesBacteria = [data[i,0] for i in range(len(data)) if data[i,2] == Bacteria]
-        yValuesBacteria = [data[i,1] for i in range(len(data)) if data[i,2] == Bacteria]
+        xValuesBacteria, yValuesBacteria = growthByTemperature(data, Bacteria)
         plt.plot(xValuesBacteria, yValuesBacteria, colors[Bacteria], label=f"{bacteria_lookup[Bacteria]}", linewidth=3)
     # We then change the title, x label, y label.
     plt.title("Growth Rate by Temperature for 4 bacteria")
@@ -184,7 +206,7 @@ def dataFilter(data : np.ndarray, filtered_data : np.ndarray) -> np.ndarray:
         # that the user chose
         print(f"Your data was successfully filtered based on the {bacteria_lookup[bacteriaNumber]} bacteria")
         # and then returns the data that only has the correct bacteria.
-        return np.array([data[i,:] for i in range(len(data)) if data[i,2] == bacteriaNumber])
+        return data[data[:,2] == bacteriaNumber]
 
     if filterNumber == 2:
         # if the user wants to filter data based on an interval for the growth rate
@@ -206,7 +228,7 @@ def dataFilter(data : np.ndarray, filtered_data : np.ndarray) -> np.ndarray:
         print("Your data was successfully filtered.")
         # The data with only the rows where the growth rate is between
         # the lower and upper bound is returned.
-        return np.array([data[i, :] for i in range(len(data)) if data[i, 1] > lowerBound and data[i, 1] < upperBound])
+        return data[(data[:,1] > lowerBound) & (data[:,1] < upperBound)]
 
 
     if filterNumber == 3:
@@ -218,6 +240,54 @@ def dataFilter(data : np.ndarray, filtered_data : np.ndarray) -> np.ndarray:
     # the data will stay the same, whether or not there is a filter on it.
     return filtered_data
 
+# This function lets the user save data to or load data from the database.
+# It takes the database connection and the current data (None if no data is loaded) as input,
+# and returns the data loaded from the database, or None if nothing was loaded.
+# The bacteria and growth rate filters are done by the database, see loadStore.
+def dataStore(connection, data):
+    storeAction = input("Type the number corresponding with what you want to do with the database:\n"
+                        "1. Save the current data to the database\n"
+                        "2. Load all data from the database\n"
+                        "3. Load one type of bacteria from the database\n"
+                        "4. Load an interval for growth rate from the database\n"
+                        "5. Go back to the main menu\n")
+    # We check that this number is a number between 1 and 5.
+    storeNumber = checkIfValidNumber(storeAction, 1, 5)
+    if storeNumber == 1:
+        # The current data (filtered or not) is appended to the database.
+        if data is None:
+            print("You need to load in your data before it can be saved."); return None
+        print(f"{storeData(connection, data)} rows were saved to the database.")
+        return None
+    if storeNumber == 2:
+        loadedData = loadStore(connection)
+    elif storeNumber == 3:
+        bacteriaNumber = input("Please type number corresponding with the type of bacteria, you want to load:\n"
+                             "1. Salmonella enterica\n"
+                             "2. Bacillus cereus\n"
+                             "3. Listeria\n"
+                             "4. Brochothrix thermosphacta\n")
+        bacteriaNumber = checkIfValidNumber(bacteriaNumber, 1, 4)
+        if bacteriaNumber is None: return None
+        loadedData = loadStore(connection, bacteria=bacteriaNumber)
+    elif storeNumber == 4:
+        # The bounds are checked the same way as in dataFilter.
+        print("The lower and upper bound will NOT be included in the data.")
+        try: lowerBound = float(input("Please input the lower bound:\n"))
+        except: print("You need to type a number"); return None
+        try: upperBound = float(input("Please input the upper bound:\n"))
+        except: print("You need to type a number"); return None
+        if lowerBound >= upperBound:
+            print("The lower bound has to be lower than the upper bound"); return None
+        loadedData = loadStore(connection, lowerBound=lowerBound, upperBound=upperBound)
+    else:
+        # Going back to the main menu, or an invalid number.
+        return None
+    if len(loadedData) == 0:
+        print("No data in the database matched."); return None
+    print(f"{len(loadedData)} rows were loaded from the database.")
+    return loadedData
+
 # This function is introduced to simplify the code related to our command-line interface.
 def checkIfValidNumber(value, lowerBound, upperBound):
     # If the input can't be converted to an int, print error and return none.
@@ -229,8 +299,9 @@ def checkIfValidNumber(value, lowerBound, upperBound):
         print("Invalid number, try another number"); return None
     return intValue
 
-def main():
+def main(storePath : str = "bacteria_store.db"):
     ## Main program:
+    # storePath is the sqlite database used by the database action.
     # This is the time of which the main program will begin.
     # First we create a variable to keep track whether the data has been loaded or not.
     # We set it to False as the data has not yet been loaded
@@ -252,13 +323,26 @@ def main():
                     "2. Filter data\n"
                     "3. Show statistics\n"
                     "4. Create plots\n"
-                    "5. Exit program\n")
-        # We then check that this input is a number between 1 and 5.
-        action = checkIfValidNumber(action, 1, 5)
+                    "5. Save to or load from the database\n"
+                    "6. Exit program\n")
+        # We then check that this input is a number between 1 and 6.
+        action = checkIfValidNumber(action, 1, 6)
         # If the user want to quit, the program loop will stop and therefore also the program.
-        if action == 5:
+        if action == 6:
             break
 
+        if action == 5:
+            # The database is used instead of a file, so this is allowed before data is loaded.
+            # If data was loaded from the database, it becomes the new unfiltered data.
+            connection = openStore(storePath)
+            loadedData = dataStore(connection, data if isDataLoaded else None)
+            connection.close()
+            if loadedData is not None:
+                data = loadedData
+                originalData = data
+                isDataLoaded = True
+            continue
+
         if action == 1:
             # If the users wants to load in data
             # the user is prompted to write the filename of the file which should be loaded
@@ -288,7 +372,7 @@ def main():
 
             if action == 3:
                 # if the user wants to get statistic, then we try to perform the function
-                # if we get an error, which will happen if the user does not input a number between 1 and 8
+                # if we get an error, which will happen if the user does not input a number between 1 and 9
                 # the user will already be informed and nothing should happen
                 try: dataStatistics(data)
                 except: None
@@ -303,5 +387,6 @@ def main():
         else:
             print("You need to load in your data before you can take any other action.")
 
-main()
-
+if __name__ == "__main__":
+    # An optional path to the database can be given: python main.py [database]
+    main(sys.argv[1]) if len(sys.argv) > 1 else main()
@@ -0,0 +1,69 @@
+# This function only runs in Python 3
+
+import sqlite3
+import numpy as np
+
+schema = """
+CREATE TABLE IF NOT EXISTS bacteria (
+    temperature INTEGER NOT NULL,
+    growth_rate REAL    NOT NULL,
+    bacteria    INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_bacteria_temperature
+    ON bacteria (bacteria, temperature);
+"""
+
+# This function opens a store and creates the table and index if they don't exist.
+# It takes the path of the sqlite file as input (in memory per default) and returns the connection.
+def openStore(path : str = ":memory:") -> sqlite3.Connection:
+    connection = sqlite3.connect(path)
+    connection.executescript(schema)
+    return connection
+
+
+# This function inserts data loaded with dataLoad into the store.
+# All rows are inserted with executemany in a single transaction.
+# The rows are appended, as the same measurement can legitimately occur more than once,
+# so storing the same file twice will count its rows twice.
+# The rows are passed to executemany as a generator, so they are never all in memory at once.
+# It returns the number of inserted rows.
+def storeData(connection : sqlite3.Connection, data : np.ndarray) -> int:
+    rows = ((int(temperature), float(growthRate), int(bacteria)) for temperature, growthRate, bacteria in data)
+    changes = connection.total_changes
+    with connection:
+        connection.executemany("INSERT INTO bacteria VALUES (?, ?, ?)", rows)
+    return connection.total_changes - changes
+
+
+# This function loads data from the store as a numpy array with the same columns as dataLoad.
+# The filters from dataFilter are done by the database instead of numpy:
+# bacteria only keeps one type of bacteria, and lowerBound and upperBound
+# keep the growth rates strictly between the two bounds.
+def loadStore(connection : sqlite3.Connection, bacteria : int = None,
+              lowerBound : float = None, upperBound : float = None) -> np.ndarray:
+    conditions = []
+    parameters = []
+    if bacteria is not None:
+        conditions.append("bacteria = ?")
+        parameters.append(bacteria)
+    if lowerBound is not None:
+        conditions.append("growth_rate > ?")
+        parameters.append(lowerBound)
+    if upperBound is not None:
+        conditions.append("growth_rate < ?")
+        parameters.append(upperBound)
+    query = "SELECT temperature, growth_rate, bacteria FROM bacteria"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    rows = connection.execute(query, parameters).fetchall()
+    return np.array(rows, dtype=float).reshape(-1, 3)
+
+
+# This function computes the count and mean growth rate for every bacteria and temperature
+# inside the database, so the data never has to be loaded.
+# It returns a numpy array with the columns bacteria, temperature, count and mean growth rate.
+def storeStatistics(connection : sqlite3.Connection) -> np.ndarray:
+    rows = connection.execute(
+        "SELECT bacteria, temperature, COUNT(*), AVG(growth_rate) FROM bacteria "
+        "GROUP BY bacteria, temperature ORDER BY bacteria, temperature").fetchall()
+    return np.array(rows, dtype=float).reshape(-1, 4)